@@ -5,12 +5,16 @@ from typing import Optional
 
 from .diceydice import ANSI, eval_expr
 
+DICE_RE = re.compile(r'(\d+)(?:d(\d*))?')
+DICE_SIDES: tuple[int, ...] = (2, 4, 6, 8, 10, 12, 20)
+# Maps each die size to the next one in the tab-completion cycle.
+NEXT_SIDES = dict(zip(DICE_SIDES, DICE_SIDES[1:] + DICE_SIDES[:1]))
+
 
 def completion(text: str, state: int) -> Optional[str]:
     if state > 0:
         return None
 
-    dice_re = re.compile(r'(\d+)(?:d(\d*))?')
     line = readline.get_line_buffer().strip()
 
     result = ''
@@ -21,18 +25,16 @@ def completion(text: str, state: int) -> Optional[str]:
             return 'h'
         if not line[-1] in '+(':
             result += '+ '
-        dice_specs: list[tuple[str, str]] = dice_re.findall(line)
+        dice_specs: list[tuple[str, str]] = DICE_RE.findall(line)
         text = "{}d{}".format(*dice_specs[-1])
 
-    if match := dice_re.match(text.lower()):
-        dice = [2, 4, 6, 8, 10, 12, 20]
+    if match := DICE_RE.match(text.lower()):
         count: str = match.group(1)
         sides: str = match.group(2)
         if not sides:
             result += f'{count}d2'
         else:
-            next_idx = (dice.index(int(sides)) + 1) % len(dice)
-            result += f'{count}d{dice[next_idx]}'
+            result += f'{count}d{NEXT_SIDES[int(sides)]}'
         return result
 
     return None
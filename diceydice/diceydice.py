@@ -1,6 +1,15 @@
-from typing import Optional
-
-from .evaluate import DiceComputation, DiceGroup, DiceRoller, DieRoll, evaluate
+from typing import Callable, cast, Optional
+
+from .evaluate import (
+    DiceComputation,
+    DiceGroup,
+    DiceRoller,
+    DieRoll,
+    evaluate,
+    LIST_SEPARATOR,
+    real_int,
+    SUM_SEPARATOR,
+)
 from .parser import tokenize
 
 # Leftwards double arrow symbol.
@@ -9,6 +18,12 @@ DOUBLE_ARROW = '\u21d0'
 # Left arrow symbol. (Reads better on my terminal.)
 ARROW = '\u2b05'
 
+# ANSI escape sequences to toggle bold and underline.
+BOLD_ON = '\033[1m'
+BOLD_OFF = '\033[22m'
+UNDERLINE_ON = '\033[4m'
+UNDERLINE_OFF = '\033[24m'
+
 
 class Formatter:
     def bold(self, text: object) -> str:
@@ -34,10 +49,10 @@ class MarkdownFormatter(Formatter):
 
 class AnsiFormatter(Formatter):
     def bold(self, text: object) -> str:
-        return f"\033[1m{text}\033[22m"
+        return f'{BOLD_ON}{text}{BOLD_OFF}'
 
     def underline(self, text: object) -> str:
-        return f"\033[4m{text}\033[24m"
+        return f'{UNDERLINE_ON}{text}{UNDERLINE_OFF}'
 
     def arrow(self) -> str:
         # Gets an extra space because it's wide in a monospace setting.
@@ -59,53 +74,101 @@ def eval_expr(
 
 
 def format_computation(roll: DiceGroup, fmt: Formatter) -> str:
-    return ' '.join([
-        format_result(roll, fmt),
-        fmt.arrow(),
-        format_roll(roll, fmt),
-    ])
+    return f'{format_result(roll, fmt)} {fmt.arrow()} {format_roll(roll, fmt)}'
 
 
 def format_result(roll: DiceGroup, fmt: Formatter) -> str:
-    result = str(roll.result) + (f'{{{roll.effects}}}' if roll.effects else '')
-    return fmt.bold(result)
+    if effects := roll.effects:
+        return fmt.bold(f'{roll.result}{{{effects}}}')
+    return fmt.bold(str(roll.result))
+
+
+# Instructions emitted by _flatten for format_roll to execute. VISIT is only
+# used internally by _flatten for nodes it has yet to expand.
+VISIT, OPEN_GROUP, PUSH_DIE, CLOSE_GROUP = range(4)
+
+FormatOp = tuple[int, DiceComputation, bool]
 
 
 def format_roll(roll: DiceComputation, fmt: Formatter, inner: bool = False) -> str:
-    if not isinstance(roll, DiceGroup) or len(roll) <= 1:
+    if not _is_compound(roll):
         return str(roll)
 
-    def should_bold(die: DiceComputation) -> bool:
-        if isinstance(die, DieRoll):
-            return die.is_crit and die.sides > 2
-        return False
-
-    def format_die(die: DiceComputation) -> str:
-        if isinstance(die, DiceGroup) and len(die) > 1:
-            if not str(die).endswith(')'):
-                return f'({die})'
-            return str(die)
-        return str(die)
-
-    separator = ', ' if roll.transformer else ' + '
-    dice = []
-    for die, transformed_value in zip(roll.dice, roll.transformer(roll.dice)):
-        roll_str = format_roll(die, fmt, inner=True)
-
-        is_selected = bool(roll.transformer) and _real_int(transformed_value)
-        if is_selected and should_bold(die):
-            dice += [fmt.underline(fmt.bold(roll_str))]
-        elif is_selected:
-            dice += [fmt.underline(roll_str)]
-        elif should_bold(die):
-            dice += [fmt.bold(roll_str)]
+    # The formatter is fixed for the whole roll, so bind its methods once.
+    bold, underline = fmt.bold, fmt.underline
+    # Each open group collects the formatted strings of its dice.
+    stack: list[list[str]] = []
+    for op, die, is_selected in _flatten(roll):
+        if op == OPEN_GROUP:
+            stack.append([])
+            continue
+        if op == PUSH_DIE:
+            stack[-1].append(
+                _emphasize(str(die), die, is_selected, bold, underline)
+            )
+            continue
+
+        group = cast(DiceGroup, die)
+        separator = LIST_SEPARATOR if group.transformer else SUM_SEPARATOR
+        dice_str = separator.join(stack.pop())
+        if not stack:
+            if inner or group.transformer:
+                return f'{group.transformer}({dice_str})'
+            return dice_str
+        group_str = f'{group.transformer}({dice_str})'
+        stack[-1].append(
+            _emphasize(group_str, group, is_selected, bold, underline)
+        )
+
+    raise AssertionError('Unbalanced format instructions')
+
+
+def _flatten(roll: DiceComputation) -> list[FormatOp]:
+    # Walks the roll depth-first without recursion, so a group's dice are
+    # always emitted between its OPEN_GROUP and CLOSE_GROUP instructions.
+    ops: list[FormatOp] = []
+    pending: list[FormatOp] = [(VISIT, roll, False)]
+    while pending:
+        op, die, is_selected = pending.pop()
+        if op == CLOSE_GROUP:
+            ops.append((op, die, is_selected))
+            continue
+        if not _is_compound(die):
+            ops.append((PUSH_DIE, die, is_selected))
+            continue
+
+        group = cast(DiceGroup, die)
+        ops.append((OPEN_GROUP, group, is_selected))
+        pending.append((CLOSE_GROUP, group, is_selected))
+        if group.transformer:
+            values = group.transformed()
+            selected = [bool(real_int(value)) for value in values]
         else:
-            dice += [roll_str]
-    dice_str = separator.join(dice)
-    if inner or roll.transformer:
-        return f'{roll.transformer}({dice_str})'
-    return dice_str
+            # Nothing in a plain sum is selected, so don't run the transformer.
+            selected = [False] * len(group.dice)
+        for child, child_selected in reversed(list(zip(group.dice, selected))):
+            pending.append((VISIT, child, child_selected))
+    return ops
 
 
-def _real_int(value: complex) -> int:
-    return int(complex(value).real)
+def _is_compound(roll: DiceComputation) -> bool:
+    return isinstance(roll, DiceGroup) and len(roll) > 1
+
+
+def _should_bold(die: DiceComputation) -> bool:
+    if isinstance(die, DieRoll):
+        return die.is_crit and die.sides > 2
+    return False
+
+
+def _emphasize(
+        text: str, die: DiceComputation, is_selected: bool,
+        bold: Callable[[object], str], underline: Callable[[object], str],
+) -> str:
+    if is_selected and _should_bold(die):
+        return underline(bold(text))
+    elif is_selected:
+        return underline(text)
+    elif _should_bold(die):
+        return bold(text)
+    return text
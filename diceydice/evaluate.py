@@ -1,8 +1,9 @@
 import operator
+from collections import Counter
 from enum import Enum
 from heapq import nlargest, nsmallest
-from itertools import compress, repeat
-from random import randrange
+from itertools import compress
+from random import choices, getrandbits, randrange
 from typing import (
     Callable,
     cast,
@@ -39,9 +40,28 @@ Comparator: TypeAlias = Callable[[object, object], bool]
 Number: TypeAlias = Union[int, complex]
 ParseNode: TypeAlias = Union[Token, 'DiceComputation']
 
+# Rolls, modifiers, selectors and groups are never modified once built. So the
+# common ones are built once and shared wherever they appear, and a group only
+# works out its transformed values and total the first time they are needed.
+
 # U+1F4A5 is the "collision symbol" emoji.
 EFFECT_SYMBOL = "\U0001f4a5"
 
+# Combat die (result, effect) pairs by d6 face. Any other face is an effect.
+COMBAT_FACES = {1: (1, False), 2: (2, False), 3: (0, False), 4: (0, False)}
+COMBAT_EFFECT_FACE = (1, True)
+
+# Die faces and modifiers are small, so their strings are built once up front.
+FACE_STRINGS = tuple(str(face) for face in range(101))
+
+# Keep selectors already built, by selector type and count.
+SELECTOR_CACHE_SIZE = 256
+_selector_cache: dict[tuple[Callable[[int], 'Selector'], int], 'Selector'] = {}
+
+# Separators between dice in a selection and in a plain sum.
+LIST_SEPARATOR = ', '
+SUM_SEPARATOR = ' + '
+
 
 class DiceTransformer(Protocol):
     def __call__(self, dice: Iterable['DiceComputation']) -> Iterable[Number]: ...
@@ -52,9 +72,9 @@ class Selector:
     name = 'all'
     count = 0
 
-    # Select all.
+    # Select all. A list is handed back as is, so callers must not mutate it.
     def __call__(self, rolls: Iterable['DiceComputation']) -> list['DiceComputation']:
-        return list(rolls)
+        return rolls if isinstance(rolls, list) else list(rolls)
 
     def __bool__(self) -> bool:
         return self.count != 0
@@ -76,7 +96,17 @@ class Highest(Selector):
         self.count = count
 
     def __call__(self, rolls: Iterable['DiceComputation']) -> list['DiceComputation']:
-        return nlargest(self.count, rolls)
+        rolls = list(rolls)
+        if self.count >= len(rolls):
+            return rolls
+        # Rank by int() directly rather than through the comparison methods.
+        # Every path below keeps the earliest of tied dice.
+        if self.count == 1:
+            return [max(rolls, key=int)]
+        # A heap only pays off when keeping a small share of the dice.
+        if self.count * 2 >= len(rolls):
+            return sorted(rolls, key=int, reverse=True)[:self.count]
+        return nlargest(self.count, rolls, key=int)
 
 
 class Lowest(Selector):
@@ -88,7 +118,17 @@ class Lowest(Selector):
         self.count = count
 
     def __call__(self, rolls: Iterable['DiceComputation']) -> list['DiceComputation']:
-        return nsmallest(self.count, rolls)
+        rolls = list(rolls)
+        if self.count >= len(rolls):
+            return rolls
+        # Rank by int() directly rather than through the comparison methods.
+        # Every path below keeps the earliest of tied dice.
+        if self.count == 1:
+            return [min(rolls, key=int)]
+        # A heap only pays off when keeping a small share of the dice.
+        if self.count * 2 >= len(rolls):
+            return sorted(rolls, key=int)[:self.count]
+        return nsmallest(self.count, rolls, key=int)
 
 
 class Operator(Enum):
@@ -98,13 +138,15 @@ class Operator(Enum):
     LT = "<"
 
     def __call__(self, left: int, right: int) -> bool:
-        map = {
-            Operator.GE: cast(Comparator, operator.ge),
-            Operator.GT: cast(Comparator, operator.gt),
-            Operator.LE: cast(Comparator, operator.le),
-            Operator.LT: cast(Comparator, operator.lt),
-        }
-        return map[self](left, right)
+        return COMPARATORS[self](left, right)
+
+
+COMPARATORS = {
+    Operator.GE: cast(Comparator, operator.ge),
+    Operator.GT: cast(Comparator, operator.gt),
+    Operator.LE: cast(Comparator, operator.le),
+    Operator.LT: cast(Comparator, operator.lt),
+}
 
 
 class Threshold(Selector):
@@ -121,12 +163,13 @@ class Threshold(Selector):
         self.count = threshold
 
     def __call__(self, rolls: Iterable['DiceComputation']) -> list['DiceComputation']:
-        def test(roll: DiceComputation) -> bool:
-            return self.oper(roll.result, self.count)
-        return list(filter(test, rolls))
+        compare, threshold = COMPARATORS[self.oper], self.count
+        return [roll for roll in rolls if compare(roll.result, threshold)]
 
 
 class DiceComputation:
+    __slots__ = ()
+
     def value(self) -> Number:
         return 0
 
@@ -140,7 +183,7 @@ class DiceComputation:
 
     def __int__(self) -> int:
         # Just get the real component if value is complex.
-        return int(complex(self.value()).real)
+        return real_int(self.value())
 
     def __str__(self) -> str:
         return str(int(self))
@@ -170,6 +213,8 @@ class DiceComputation:
 
 
 class DieRoll(DiceComputation):
+    __slots__ = ('sides', '_result')
+
     def __init__(self, sides: int, result: int):
         self.sides = sides
         self._result = result
@@ -181,6 +226,12 @@ class DieRoll(DiceComputation):
     def value(self) -> int:
         return self._result
 
+    def __int__(self) -> int:
+        return self._result
+
+    def __str__(self) -> str:
+        return _int_str(self._result)
+
     def __repr__(self) -> str:
         return f'DieRoll(sides={self.sides}, result={self.result})'
 
@@ -195,10 +246,28 @@ class DieRoll(DiceComputation):
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, DieRoll):
             return False
-        return (self.sides, self.result) == (other.sides, other.result)
+        return self.sides == other.sides and self._result == other._result
+
+    def __hash__(self) -> int:
+        return hash((self.sides, self._result))
+
+    @staticmethod
+    def of(sides: int, result: int) -> 'DieRoll':
+        # Share one instance per common face instead of allocating per die.
+        return COMMON_ROLLS.get((sides, result)) or DieRoll(sides, result)
+
+
+# Every face of the standard dice.
+COMMON_ROLLS = {
+    (sides, result): DieRoll(sides, result)
+    for sides in (2, 4, 6, 8, 10, 12, 20)
+    for result in range(1, sides + 1)
+}
 
 
 class CombatDieRoll(DiceComputation):
+    __slots__ = ('_result', 'effect')
+
     def __init__(self, result: int, effect: bool = False):
         self._result = result
         self.effect = effect
@@ -206,8 +275,15 @@ class CombatDieRoll(DiceComputation):
     def value(self) -> complex:
         return self._result + (1j if self.effect else 0)
 
+    @property
+    def effects(self) -> int:
+        return int(self.effect)
+
+    def __int__(self) -> int:
+        return self._result
+
     def __str__(self) -> str:
-        return EFFECT_SYMBOL if self.effect else str(self.result)
+        return EFFECT_SYMBOL if self.effect else _int_str(self._result)
 
     def __repr__(self) -> str:
         return f'CombatDieRoll(result={self.result}, effect={self.effect})'
@@ -216,41 +292,74 @@ class CombatDieRoll(DiceComputation):
     def from_d6(cls, roll: DieRoll) -> 'CombatDieRoll':
         if roll.sides != 6:
             raise ValueError("Can't create combat die from non-d6")
-        return (
-            CombatDieRoll(1) if roll.result == 1
-            else CombatDieRoll(2) if roll.result == 2
-            else CombatDieRoll(0) if roll.result in (3, 4)
-            else CombatDieRoll(1, effect=True)
-        )
+        return COMBAT_ROLLS.get(roll.result, COMBAT_EFFECT_ROLL)
+
+
+# The combat result for each d6 face.
+COMBAT_ROLLS = {
+    face: CombatDieRoll(result, effect)
+    for face, (result, effect) in COMBAT_FACES.items()
+}
+COMBAT_EFFECT_ROLL = CombatDieRoll(*COMBAT_EFFECT_FACE)
 
 
 class Modifier(DiceComputation):
+    __slots__ = ('_value',)
+
     def __init__(self, value: int):
         self._value = value
 
     def value(self) -> int:
         return self._value
 
+    def __int__(self) -> int:
+        return self._value
+
+    def __str__(self) -> str:
+        return _int_str(self._value)
+
+    @staticmethod
+    def of(value: int) -> 'Modifier':
+        # Share one instance per common modifier instead of allocating each.
+        return COMMON_MODIFIERS.get(value) or Modifier(value)
+
+
+# Small modifiers are by far the most common.
+COMMON_MODIFIERS = {value: Modifier(value) for value in range(-32, 128)}
+
 
 class DiceGroup(DiceComputation):
+    __slots__ = ('dice', 'transformer', 'is_closed', '_transformed', '_value')
+
     def __init__(
             self, dice: Iterable[DiceComputation],
             transformer: DiceTransformer,
             is_closed: bool = False,
+            *, _dice: Optional[list[DiceComputation]] = None,
     ):
-        self.dice = list(dice)
+        # Callers that just built a list for this group alone hand it over as
+        # _dice to skip the copy.
+        self.dice = list(dice) if _dice is None else _dice
         self.transformer = transformer
         self.is_closed = is_closed
+        # Worked out on first use.
+        self._transformed: Optional[list[Number]] = None
+        self._value: Optional[Number] = None
 
     def close(self) -> 'DiceGroup':
         return DiceGroup(self.dice, self.transformer, True)
 
+    def transformed(self) -> list[Number]:
+        if self._transformed is None:
+            self._transformed = list(self.transformer(self.dice))
+        return self._transformed
+
     def kept(self) -> Iterable[DiceComputation]:
-        return compress(self.dice, self.transformer(self.dice))
+        return compress(self.dice, self.transformed())
 
     def kept_indexes(self) -> Iterable[int]:
-        for idx, value in enumerate(self.transformer(self.dice)):
-            if _real_int(value):
+        for idx, value in enumerate(self.transformed()):
+            if real_int(value):
                 yield idx
 
     def __bool__(self) -> bool:
@@ -268,13 +377,15 @@ class DiceGroup(DiceComputation):
         return iter(self.kept())
 
     def __str__(self) -> str:
-        return self.fmt_str(', ')
+        return self.fmt_str(LIST_SEPARATOR)
 
     def __repr__(self) -> str:
         return f'DiceGroup({self.dice!r})'
 
     def value(self) -> Number:
-        return sum(self.transformer(self.dice))
+        if self._value is None:
+            self._value = sum(self.transformed())
+        return self._value
 
     @staticmethod
     def add_computation(left: DiceComputation, right: DiceComputation) -> 'DiceGroup':
@@ -283,46 +394,16 @@ class DiceGroup(DiceComputation):
             actual = left or right
             if isinstance(actual, DiceGroup):
                 return actual
-            return DiceSum([actual])
-
-        def is_closed_group(dc: DiceComputation) -> bool:
-            return isinstance(dc, DiceGroup) and dc.is_closed
-
-        def dice_list(dc: DiceComputation) -> list[DiceComputation]:
-            if isinstance(dc, DiceGroup):
-                return dc.dice
-            return [dc]
-
-        # When a group is closed, it doesn't merge with another. We only create
-        # a new group containing it and whatever else.
-        if is_closed_group(left) and is_closed_group(right):
-            return DiceSum([left, right])
-        elif is_closed_group(left):
-            return DiceSum([left] + dice_list(right))
-        elif is_closed_group(right):
-            return DiceSum(dice_list(left) + [right])
-
-        # If there's a nontrivial transformer, we cannot generally combine the
-        # group with anything. We must create a new group containing both.
-        has_transformer = (
-            isinstance(left, DiceGroup) and left.transformer
-            or isinstance(right, DiceGroup) and right.transformer
-        )
-        if has_transformer:
-            return DiceSum([left, right])
+            return DiceSum(_dice=[actual])
 
-        # If both are groups, merge them.
-        if isinstance(left, DiceGroup) and isinstance(right, DiceGroup):
-            return DiceSum(left.dice + right.dice)
-
-        # If either isn't a group, it's a single computation, which can just be
-        # added to the other's list.
-        if isinstance(left, DiceGroup):
-            return DiceSum(left.dice + [right])
-        if isinstance(right, DiceGroup):
-            return DiceSum([left] + right.dice)
-
-        raise TypeError(f'Unable to add {type(left)} and {type(right)}')
+        rule = ADDITION_RULES.get((_group_kind(left), _group_kind(right)))
+        if rule is None:
+            raise TypeError(f'Unable to add {type(left)} and {type(right)}')
+        splice_left, splice_right = rule
+        return DiceSum(_dice=(
+            (cast(DiceGroup, left).dice if splice_left else [left])
+            + (cast(DiceGroup, right).dice if splice_right else [right])
+        ))
 
     def __add__(self, other: DiceComputation) -> 'DiceGroup':
         return self.add_computation(self, other)
@@ -342,21 +423,26 @@ class DiceGroup(DiceComputation):
         if not self.transformer:
             return separator.join(map(str, self.dice))
 
-        formatted = ''
-        kept_indexes = set(self.kept_indexes())
-        for idx, die in enumerate(map(self.fmt_die, self.dice)):
-            formatted += separator if idx else ''
-            formatted += f"[{die}]" if idx in kept_indexes else die
+        dice = map(self.fmt_die, self.dice)
+        formatted = separator.join(
+            f"[{die}]" if real_int(value) else die
+            for die, value in zip(dice, self.transformed())
+        )
         return f'{self.transformer}({formatted})'
 
 
 class DiceSum(DiceGroup):
+    __slots__ = ()
+
     def __init__(
-            self, dice: Iterable[DiceComputation],
+            self, dice: Iterable[DiceComputation] = (),
             transformer: Optional[DiceTransformer] = None,
             is_closed: bool = False,
+            *, _dice: Optional[list[DiceComputation]] = None,
     ):
-        super().__init__(dice, transformer or IdentityTransformer(), is_closed)
+        super().__init__(
+            dice, transformer or IDENTITY_TRANSFORMER, is_closed, _dice=_dice
+        )
 
     def close(self) -> 'DiceSum':
         return DiceSum(self.dice, self.transformer, True)
@@ -374,10 +460,10 @@ class DiceSum(DiceGroup):
         return DiceSum(self.dice, transformer)
 
     def highest(self, count: int = 1) -> "DiceSum":
-        return self.keep(Highest(count))
+        return self.keep(_shared_selector(Highest, count))
 
     def lowest(self, count: int = 1) -> "DiceSum":
-        return self.keep(Lowest(count))
+        return self.keep(_shared_selector(Lowest, count))
 
     def le(self, threshold: int) -> 'DiceSum':
         return self.count(Threshold(Operator.LE, threshold))
@@ -398,7 +484,7 @@ class DiceSum(DiceGroup):
         return self.count(Threshold(Operator.GT, threshold))
 
     def __str__(self) -> str:
-        return self.fmt_str(' + ')
+        return self.fmt_str(SUM_SEPARATOR)
 
     def __repr__(self) -> str:
         return f'DiceSum(dice={self.dice!r}, transformer={self.transformer!r})'
@@ -420,13 +506,8 @@ class KeepSelected:
         return f'KeepSelected({self.selector!r})'
 
     def __call__(self, dice: Iterable[DiceComputation]) -> Iterable[Number]:
-        kept_dice = self.selector(dice)
-        for die in dice:
-            if die in kept_dice:
-                kept_dice.remove(die)
-                yield die.value()
-            else:
-                yield 0
+        for die, is_kept in zip(dice, _selection_mask(self.selector, dice)):
+            yield die.value() if is_kept else 0
 
 
 class IdentityTransformer(KeepSelected):
@@ -439,6 +520,14 @@ class IdentityTransformer(KeepSelected):
     def __repr__(self) -> str:
         return 'IdentityTransformer()'
 
+    def __call__(self, dice: Iterable[DiceComputation]) -> Iterable[Number]:
+        # Every die is kept, so skip matching each one against the selection.
+        return [die.value() for die in dice]
+
+
+# Plain sums all share one identity transformer, since it holds no state.
+IDENTITY_TRANSFORMER = IdentityTransformer()
+
 
 class CountSelected:
     def __init__(
@@ -465,46 +554,93 @@ class CountSelected:
         return None
 
     def __call__(self, dice: Iterable[DiceComputation]) -> Iterable[Number]:
-        kept_dice = self.selector(dice)
-        for die in dice:
-            if die in kept_dice:
-                kept_dice.remove(die)
+        for die, is_kept in zip(dice, _selection_mask(self.selector, dice)):
+            if is_kept:
                 yield 1 if not (new_value := self.override(die)) else new_value
             else:
                 yield 0 if not (new_value := self.override(die)) else new_value
 
 
+# How each postfix operator applies to the sum before it, by operator type.
+POSTFIX_METHODS: dict[type[Token], Callable[[DiceSum, Token], DiceSum]] = {
+    KeepHighest: lambda dice, op: dice.highest(cast(KeepHighest, op).count),
+    KeepLowest: lambda dice, op: dice.lowest(cast(KeepLowest, op).count),
+    LE: lambda dice, op: dice.le(cast(LE, op).threshold),
+    CritLE: lambda dice, op: dice.crit_le(cast(CritLE, op).threshold),
+    LT: lambda dice, op: dice.lt(cast(LT, op).threshold),
+    GE: lambda dice, op: dice.ge(cast(GE, op).threshold),
+    CritGE: lambda dice, op: dice.crit_ge(cast(CritGE, op).threshold),
+    GT: lambda dice, op: dice.gt(cast(GT, op).threshold),
+}
+
+# The starting point for summing a group.
+EMPTY_SUM = DiceSum([])
+
+
 class DiceRoller:
-    def __init__(self, rng: Callable[[int], int]):
+    def __init__(
+            self, rng: Callable[[int], int],
+            rng_many: Optional[Callable[[int, int], Iterable[int]]] = None,
+    ):
         self.rng = rng
+        # Optionally rolls a whole pool of same-sided dice in one call.
+        self.rng_many = rng_many
+        # Tokens that evaluate on their own, looked up by their exact type.
+        self._evaluators: dict[
+            type[Token], Callable[[Token], DiceComputation]
+        ] = {
+            Dice: lambda token: self.evaluate_dice(cast(Dice, token)),
+            Combat: lambda token: self.evaluate_combat(cast(Combat, token)),
+            Constant: lambda token: Modifier.of(cast(Constant, token).value),
+        }
 
     def roll(self, sides: int) -> DieRoll:
-        return DieRoll(sides=sides, result=self.rng(sides))
+        return DieRoll.of(sides, self.rng(sides))
 
     def evaluate(self, tokens: Iterable[Token]) -> DiceGroup:
         return self.eval_summation(tokens)
 
     def eval_summation(self, tokens: Iterable[Token]) -> DiceGroup:
+        # Token sequences are scanned twice, so only one-shot iterables are
+        # materialized first.
+        if not isinstance(tokens, (list, tuple)):
+            tokens = list(tokens)
+        if not any(map(_is_structural, tokens)):
+            return self.eval_flat_sum(tokens)
+
         context: list[ParseNode] = []
+        # Positions in context of the currently open GROUP_START markers.
+        group_starts: list[int] = []
         for token in tokens:
             if token is Token.GROUP_START:
+                group_starts.append(len(context))
                 context.append(token)
             elif token is Token.GROUP_END:
-                current_group: list[ParseNode] = []
-                while (last_token := context.pop()) is not Token.GROUP_START:
-                    current_group.append(last_token)
-                context.append(self.evaluate_group(reversed(current_group)))
-            elif isinstance(token, Dice):
-                context.append(self.evaluate_dice(token))
-            elif isinstance(token, Combat):
-                context.append(self.evaluate_combat(token))
+                start = group_starts.pop()
+                current_group = context[start + 1:]
+                del context[start:]
+                context.append(self.evaluate_group(current_group))
+            elif evaluator := self._evaluators.get(type(token)):
+                context.append(evaluator(token))
             elif isinstance(token, PostfixOperator):
                 context.append(self.apply_postfix(context.pop(), token))
-            elif isinstance(token, Constant):
-                context.append(Modifier(token.value))
 
         return self.evaluate_group(context)
 
+    def eval_flat_sum(self, tokens: Iterable[Token]) -> DiceGroup:
+        # With no groups or postfix operators, every term's dice simply join
+        # one flat sum, so there's no need to build and merge a group per term.
+        dice: list[DiceComputation] = []
+        evaluators = self._evaluators
+        for token in tokens:
+            if evaluator := evaluators.get(type(token)):
+                computation = evaluator(token)
+                if isinstance(computation, DiceGroup):
+                    dice.extend(computation.dice)
+                else:
+                    dice.append(computation)
+        return DiceSum(_dice=dice, is_closed=True)
+
     def apply_postfix(
             self, node: ParseNode, postfix: PostfixOperator
     ) -> DiceGroup:
@@ -512,54 +648,180 @@ class DiceRoller:
             raise DiceSyntaxError(
                 f'{postfix} operator must follow dice roll or group'
             )
-        last_result: DiceSum = node
-        if isinstance(postfix, KeepHighest):
-            return last_result.highest(postfix.count)
-        if isinstance(postfix, KeepLowest):
-            return last_result.lowest(postfix.count)
-        if isinstance(postfix, LE):
-            return last_result.le(postfix.threshold)
-        if isinstance(postfix, CritLE):
-            return last_result.crit_le(postfix.threshold)
-        if isinstance(postfix, LT):
-            return last_result.lt(postfix.threshold)
-        if isinstance(postfix, GE):
-            return last_result.ge(postfix.threshold)
-        if isinstance(postfix, CritGE):
-            return last_result.crit_ge(postfix.threshold)
-        if isinstance(postfix, GT):
-            return last_result.gt(postfix.threshold)
+        if apply := POSTFIX_METHODS.get(type(postfix)):
+            return apply(node, postfix)
         raise ValueError(f'Unhandled postfix operator {postfix!r}')
 
     def evaluate_group(self, nodes: Iterable[ParseNode]) -> DiceGroup:
-        result: DiceGroup = DiceSum([])
+        result: DiceGroup = EMPTY_SUM
+        # While nonempty, the dice of the plain sum that stands for result.
+        # Plain terms join this list, and the sum is only built once the run
+        # ends, rather than copying the dice into a new sum per term.
+        run: list[DiceComputation] = []
+        # Ordered by frequency: eval_summation only ever passes evaluated
+        # nodes, while raw tokens only arrive when a token list is evaluated
+        # directly.
         for node in nodes:
-            if isinstance(node, Dice):
-                result += self.evaluate_dice(node)
-            elif isinstance(node, DiceComputation):
-                result += node
+            if isinstance(node, DiceComputation):
+                computation = node
             elif node is Token.ADD:
                 continue
+            elif type(node) is Dice:
+                computation = self.evaluate_dice(node)
             else:
                 raise DiceSyntaxError(f'Illegal token "{node}" in group')
+
+            if run:
+                if not computation:
+                    continue
+                kind = _group_kind(computation)
+                splice_left, splice_right = ADDITION_RULES[(PLAIN_GROUP, kind)]
+                if splice_left:
+                    if splice_right:
+                        run.extend(cast(DiceGroup, computation).dice)
+                    else:
+                        run.append(computation)
+                    continue
+                # The computation nests the sum so far, so the run ends here.
+                result, run = DiceSum(_dice=run), []
+
+            result += computation
+            if _group_kind(result) == PLAIN_GROUP:
+                run = list(result.dice)
+        if run:
+            return DiceSum(_dice=run, is_closed=True)
         return result.close()
 
+    def roll_many(self, sides: int, count: int) -> Iterable[int]:
+        if self.rng_many:
+            return self.rng_many(sides, count)
+        rng = self.rng
+        return [rng(sides) for _ in range(count)]
+
     def evaluate_dice(self, dice: Dice) -> DiceSum:
-        rolls = repeat(dice.sides, dice.count)
-        return DiceSum(map(self.roll, rolls))
+        sides, roll = dice.sides, DieRoll.of
+        results = self.roll_many(sides, dice.count)
+        return DiceSum(_dice=[roll(sides, result) for result in results])
 
     def evaluate_combat(self, dice: Combat) -> DiceSum:
-        rolls = repeat(6, dice.count)
-        d6_rolls = map(self.roll, rolls)
-        return DiceSum(map(CombatDieRoll.from_d6, d6_rolls))
+        # Map the d6 faces straight to shared combat results, skipping the
+        # intermediate d6 rolls.
+        rolls = COMBAT_ROLLS.get
+        return DiceSum(_dice=[
+            rolls(result, COMBAT_EFFECT_ROLL)
+            for result in self.roll_many(6, dice.count)
+        ])
 
 
-def random_roll(sides: int) -> int:
-    return randrange(sides) + 1
+# Dice with a power-of-two number of sides roll straight from random bits,
+# which skips randrange's rejection sampling.
+POWER_OF_TWO_BITS = {1 << bits: bits for bits in range(1, 7)}
+
+# choices() scales a random float, so it is only uniform up to 2**53 sides.
+MAX_CHOICES_SIDES = 1 << 53
 
 
-def _real_int(value: Number) -> int:
-    return int(complex(value).real)
+def random_roll(sides: int) -> int:
+    if bits := POWER_OF_TWO_BITS.get(sides):
+        return getrandbits(bits) + 1
+    return randrange(sides) + 1
 
 
-evaluate = DiceRoller(random_roll).evaluate
+def random_rolls(sides: int, count: int) -> list[int]:
+    if bits := POWER_OF_TWO_BITS.get(sides):
+        return [getrandbits(bits) + 1 for _ in range(count)]
+    if not 1 <= sides <= MAX_CHOICES_SIDES:
+        # Let randrange reject the empty range, or roll the huge die exactly,
+        # as rolling singly would.
+        return [random_roll(sides) for _ in range(count)]
+    return choices(range(1, sides + 1), k=count)
+
+
+def real_int(value: Number) -> int:
+    # The real component of a value as an int. Values are nearly always plain
+    # ints already, so those skip the conversion.
+    if type(value) is int:
+        return value
+    return int(value.real)
+
+
+# How an operand takes part in addition: a single computation, an open group
+# with no transformer, an open group with a nontrivial transformer, or a
+# closed group.
+SINGLE, PLAIN_GROUP, SELECTED_GROUP, CLOSED_GROUP = range(4)
+
+# For each pair of operand kinds, whether the left and right operands' dice are
+# spliced into the sum (True) or the operand is nested whole (False). Missing
+# pairs cannot be added.
+ADDITION_RULES = {
+    # When a group is closed, it doesn't merge with another. We only create a
+    # new group containing it and whatever else.
+    (CLOSED_GROUP, CLOSED_GROUP): (False, False),
+    (CLOSED_GROUP, SINGLE): (False, False),
+    (CLOSED_GROUP, PLAIN_GROUP): (False, True),
+    (CLOSED_GROUP, SELECTED_GROUP): (False, True),
+    (SINGLE, CLOSED_GROUP): (False, False),
+    (PLAIN_GROUP, CLOSED_GROUP): (True, False),
+    (SELECTED_GROUP, CLOSED_GROUP): (True, False),
+    # If there's a nontrivial transformer, we cannot generally combine the
+    # group with anything. We must create a new group containing both.
+    (SELECTED_GROUP, SINGLE): (False, False),
+    (SELECTED_GROUP, PLAIN_GROUP): (False, False),
+    (SELECTED_GROUP, SELECTED_GROUP): (False, False),
+    (SINGLE, SELECTED_GROUP): (False, False),
+    (PLAIN_GROUP, SELECTED_GROUP): (False, False),
+    # Plain groups merge, and single computations join a group's list.
+    (PLAIN_GROUP, PLAIN_GROUP): (True, True),
+    (PLAIN_GROUP, SINGLE): (True, False),
+    (SINGLE, PLAIN_GROUP): (False, True),
+}
+
+
+def _group_kind(dc: DiceComputation) -> int:
+    if not isinstance(dc, DiceGroup):
+        return SINGLE
+    if dc.is_closed:
+        return CLOSED_GROUP
+    return SELECTED_GROUP if dc.transformer else PLAIN_GROUP
+
+
+def _is_structural(token: Token) -> bool:
+    return (
+        token is Token.GROUP_START
+        or token is Token.GROUP_END
+        or isinstance(token, PostfixOperator)
+    )
+
+
+def _shared_selector(
+        factory: Callable[[int], Selector], count: int
+) -> Selector:
+    key = (factory, count)
+    if (selector := _selector_cache.get(key)) is None:
+        if len(_selector_cache) >= SELECTOR_CACHE_SIZE:
+            _selector_cache.clear()
+        selector = _selector_cache[key] = factory(count)
+    return selector
+
+
+def _selection_mask(
+        selector: Selector, dice: Iterable[DiceComputation]
+) -> Iterator[bool]:
+    # Selectors hand back the dice objects themselves, so they can be matched
+    # by identity. Counting handles the same object appearing more than once.
+    remaining = Counter(map(id, selector(dice)))
+    for die in dice:
+        if remaining[id(die)]:
+            remaining[id(die)] -= 1
+            yield True
+        else:
+            yield False
+
+
+def _int_str(value: int) -> str:
+    if 0 <= value < len(FACE_STRINGS):
+        return FACE_STRINGS[value]
+    return str(value)
+
+
+evaluate = DiceRoller(random_roll, random_rolls).evaluate
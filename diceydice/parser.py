@@ -1,13 +1,11 @@
-import inspect
 import re
-from abc import ABCMeta, abstractmethod
-from typing import ClassVar, Optional
+from typing import Callable, cast, ClassVar, Optional
 from typing_extensions import Self
 
 from .exceptions import TokenizeError
 
 
-class TokenMeta(ABCMeta):
+class TokenMeta(type):
     match_regexes: list[str] = []
 
     def __new__(
@@ -21,27 +19,27 @@ class TokenMeta(ABCMeta):
             match: Optional[str] = None, **kwargs: object
     ) -> None:
         super().__init__(name, bases, namespace)
+        # Only the root of the hierarchy, BaseToken, goes without a regex.
         if match is None and not (
-            inspect.isabstract(cls)
+            not bases
             or cls.has_regex()
         ):
             raise Exception("Token classes must have a regex matcher.")
         elif match is not None:
-            TokenMeta.match_regexes.append(match)
+            # Named after the class, so a match says which token type it is.
+            TokenMeta.match_regexes.append(f"(?P<{name}>{match})")
             cls._regex = re.compile(f"^{match}$")
         for name, arg in kwargs.items():
             instance: object = cls(arg)
             setattr(cls, name, instance)
 
     def has_regex(cls) -> bool:
-        try:
-            cls._regex
-            return True
-        except AttributeError:
-            return False
+        return hasattr(cls, '_regex')
 
 
 class BaseToken(metaclass=TokenMeta):
+    __slots__ = ()
+
     @classmethod
     def match(cls, token_str: str) -> Optional[Self]:
         try:
@@ -54,12 +52,13 @@ class BaseToken(metaclass=TokenMeta):
         return cls._regex.match(token_str)
 
     @classmethod
-    @abstractmethod
     def from_str(cls, token_str: str) -> Self:
-        ...
+        raise NotImplementedError
 
 
 class Token(BaseToken, match=r"\S"):
+    __slots__ = ('token_str',)
+
     ADD: ClassVar[Self]
     GROUP_START: ClassVar[Self]
     GROUP_END: ClassVar[Self]
@@ -83,9 +82,11 @@ class Token(BaseToken, match=r"\S"):
         elif token == ')':
             return Token.GROUP_END
 
-        for token_type in cls.__subclasses__():
-            if match := token_type.match(token):
-                return match
+        # The combined tokenizer already knows which token type, if any, the
+        # whole string is, so only that type needs to parse it.
+        match = TOKENIZER.fullmatch(token)
+        if match and match.lastgroup != Token.__name__:
+            return TOKEN_TYPES[cast(str, match.lastgroup)].from_str(token)
 
         raise ValueError(f'Unknown token {token_str}')
 
@@ -96,6 +97,8 @@ Token.ADD = Token('+')
 
 
 class Constant(Token, match=r'(-?)\s*(\d+)\b'):
+    __slots__ = ('value',)
+
     def __init__(self, value: int):
         super().__init__(str(value))
         self.value = value
@@ -119,6 +122,8 @@ class Constant(Token, match=r'(-?)\s*(\d+)\b'):
 
 
 class Dice(Token, match=r'(\d+)d(\d+)'):
+    __slots__ = ('count', 'sides')
+
     def __init__(self, count: int, sides: int):
         super().__init__(f'{count}d{sides}')
         self.count = count
@@ -142,30 +147,23 @@ class Dice(Token, match=r'(\d+)d(\d+)'):
 
 
 class PostfixOperator(Token, match=r'((?:k?[hl])|<-|->|(?:[<>]=?))(\d*)'):
+    __slots__ = ()
+
     @classmethod
     def from_str(cls, token_str: str) -> 'PostfixOperator':
         try:
             if match := cls.parse(token_str):
                 keep_type: str = match.group(1)
                 count: str = match.group(2)
-                return {
-                    'h': KeepHighest,
-                    'kh': KeepHighest,
-                    'l': KeepLowest,
-                    'kl': KeepLowest,
-                    '>=': GE,
-                    '>': GT,
-                    '<=': LE,
-                    '<': LT,
-                    '<-': CritLE,
-                    '->': CritGE,
-                }[keep_type](int(count or '1'))
+                return POSTFIX_OPERATORS[keep_type](int(count or '1'))
         except KeyError:
             pass
         raise ValueError(f'Invalid Operator syntax {token_str!r}')
 
 
 class KeepHighest(PostfixOperator):
+    __slots__ = ('count',)
+
     def __init__(self, count: int):
         super().__init__(f'kh{count}')
         self.count = count
@@ -180,6 +178,8 @@ class KeepHighest(PostfixOperator):
 
 
 class KeepLowest(PostfixOperator):
+    __slots__ = ('count',)
+
     def __init__(self, count: int):
         super().__init__(f'kl{count}')
         self.count = count
@@ -194,6 +194,8 @@ class KeepLowest(PostfixOperator):
 
 
 class ThresholdOperator(PostfixOperator):
+    __slots__ = ('oper', 'threshold')
+
     def __init__(self, oper: str, threshold: int):
         super().__init__(f'{oper}{threshold}')
         self.oper = oper
@@ -212,36 +214,65 @@ class ThresholdOperator(PostfixOperator):
 
 
 class CritGE(ThresholdOperator):
+    __slots__ = ()
+
     def __init__(self, threshold: int):
         super().__init__('->', threshold)
 
 
 class CritLE(ThresholdOperator):
+    __slots__ = ()
+
     def __init__(self, threshold: int):
         super().__init__('<-', threshold)
 
 
 class GE(ThresholdOperator):
+    __slots__ = ()
+
     def __init__(self, threshold: int):
         super().__init__('>=', threshold)
 
 
 class GT(ThresholdOperator):
+    __slots__ = ()
+
     def __init__(self, threshold: int):
         super().__init__('>', threshold)
 
 
 class LE(ThresholdOperator):
+    __slots__ = ()
+
     def __init__(self, threshold: int):
         super().__init__('<=', threshold)
 
 
 class LT(ThresholdOperator):
+    __slots__ = ()
+
     def __init__(self, threshold: int):
         super().__init__('<', threshold)
 
 
+# Postfix operator types by their symbol.
+POSTFIX_OPERATORS: dict[str, Callable[[int], PostfixOperator]] = {
+    'h': KeepHighest,
+    'kh': KeepHighest,
+    'l': KeepLowest,
+    'kl': KeepLowest,
+    '>=': GE,
+    '>': GT,
+    '<=': LE,
+    '<': LT,
+    '<-': CritLE,
+    '->': CritGE,
+}
+
+
 class Combat(Token, match=r'(\d*)c'):
+    __slots__ = ('count',)
+
     def __init__(self, count: int):
         self.count = count
 
@@ -258,14 +289,39 @@ class Combat(Token, match=r'(\d*)c'):
         raise ValueError(f'Invalid combat dice syntax {token_str!r}')
 
 
+# Reversing because more specific regexes follow less specific ones. This
+# ensures we test from most to least specific. Yes, this introduces an
+# unpleasant dependency on the ordering of the class definitions here.
+TOKENIZER = re.compile('|'.join(reversed(TokenMeta.match_regexes)))
+
+# Token types by the name of their group in TOKENIZER.
+TOKEN_TYPES: dict[str, type[Token]] = {
+    token_type.__name__: token_type
+    for token_type in [Token] + Token.__subclasses__()
+}
+
+
+# Token sequences already parsed, by expression. Each caller gets its own list.
+TOKENIZE_CACHE_SIZE = 512
+_tokenize_cache: dict[str, tuple[Token, ...]] = {}
+
+
 def tokenize(expression: str) -> list[Token]:
-    # Reversing because more specific regexes follow less specific ones. This
-    # ensures we test from most to least specific. Yes, this introduces an
-    # unpleasant dependency on the ordering of the class definitions here.
-    all_tokens = re.compile('|'.join(reversed(TokenMeta.match_regexes)))
-    token_strings = list(all_tokens.finditer(expression.lower()))
-    matches = (match.group(0) for match in token_strings)
+    if (tokens := _tokenize_cache.get(expression)) is None:
+        if len(_tokenize_cache) >= TOKENIZE_CACHE_SIZE:
+            _tokenize_cache.clear()
+        tokens = _tokenize_cache[expression] = _tokenize(expression)
+    return list(tokens)
+
+
+def _tokenize(expression: str) -> tuple[Token, ...]:
+    # The group that matched already names the token type, so only that type
+    # needs to parse the token. Anything caught by the catch-all Token regex
+    # still goes through Token.from_str to be recognized or rejected.
     try:
-        return list(map(Token.from_str, matches))
+        return tuple(
+            TOKEN_TYPES[cast(str, match.lastgroup)].from_str(match.group(0))
+            for match in TOKENIZER.finditer(expression.lower())
+        )
     except ValueError as exc:
         raise TokenizeError(str(exc)) from exc
@@ -1,7 +1,7 @@
 import pytest
 
 from diceydice.diceydice import eval_expr, PLAIN
-from diceydice.evaluate import DiceRoller
+from diceydice.evaluate import DiceRoller, random_roll, random_rolls
 
 
 def high_roller() -> DiceRoller:
@@ -70,3 +70,28 @@ def test_eval_expr_mid_rolls(input, output):
 def test_eval_expr_low_rolls(input, output):
     result = eval_expr(input, formatter=PLAIN, dice_roller=low_roller())
     assert result == output
+
+
+def test_eval_expr_zero_sided_dice():
+    with pytest.raises(ValueError, match='empty range'):
+        eval_expr('1d0')
+
+
+@pytest.mark.parametrize('sides', [1, 2, 3, 4, 6, 8, 10, 12, 20, 64, 100])
+def test_random_rolls_in_range(sides):
+    rolls = [random_roll(sides) for _ in range(200)]
+    rolls += random_rolls(sides, 200)
+    assert min(rolls) >= 1
+    assert max(rolls) <= sides
+
+
+def test_eval_expr_huge_dice():
+    sides = 9999999999999999999
+    result = eval_expr(f'1d{sides}', formatter=PLAIN)
+    assert 1 <= int(result.split()[0]) <= sides
+
+
+def test_random_rolls_huge_dice_use_low_bits():
+    # Scaling a float would leave the low bits of every roll the same.
+    rolls = random_rolls(1 << 60, 200)
+    assert len({roll % 128 for roll in rolls}) > 1
@@ -1,6 +1,8 @@
 import pytest
 
-from diceydice.evaluate import CombatDieRoll, DiceSum, DiceRoller, DieRoll
+from diceydice.evaluate import (
+    CombatDieRoll, DiceSum, DiceRoller, DieRoll, Modifier,
+)
 from diceydice.parser import Dice, tokenize
 
 
@@ -54,6 +56,20 @@ def test_evaluate_group_illegal_nested_group():
         roller().evaluate_group(tokenize('1d20 + (1d4 + 1d2)'))
 
 
+def test_evaluate_group_results_own_their_dice():
+    empty = roller().evaluate(tokenize('()'))
+    empty.dice.append(Modifier(1000))
+    assert roller().evaluate(tokenize('(1d6) + 2')).value() == 8
+    assert roller().evaluate_group([]).value() == 0
+
+
+def test_evaluate_group_leaves_groups_unchanged():
+    group = DiceSum([DieRoll(6, 6)])
+    result = roller().evaluate_group([group, Dice(1, 4), Modifier(2)])
+    assert result.value() == 12
+    assert group.dice == [DieRoll(6, 6)]
+
+
 @pytest.fixture
 def dice_result(request):
     tokens = tokenize(request.param)
@@ -97,6 +113,7 @@ def test_dice_result_value(dice_result, expected_value):
         ('2d20 h1', [0]),
         ('(1d2 + 1d4 + 1d6 + 1d8)kh2', [2, 3]),
         ('(1d2 + 1d8 + 1d4 + 1d6 + 1d6)kh2', [1, 3]),
+        ('(3d6)kh2', [0, 1]),
     ],
     indirect=['dice_result'],
 )
@@ -122,6 +139,8 @@ def test_dice_result():
     [
         ([2, 1, 1], 1, 2),
         ([2, 3, 1], 2, 5),
+        ([4, 1, 3, 2], 3, 9),
+        ([2, 3, 1], 5, 6),
     ],
 )
 def test_dice_result_highest(roll_results, count, expected_value):
@@ -135,6 +154,8 @@ def test_dice_result_highest(roll_results, count, expected_value):
     [
         ([2, 1, 5], 1, 1),
         ([2, 1, 5], 2, 3),
+        ([4, 1, 3, 2], 3, 6),
+        ([2, 1, 5], 5, 8),
     ],
 )
 def test_dice_result_lowest(roll_results, count, expected_value):
@@ -143,6 +164,32 @@ def test_dice_result_lowest(roll_results, count, expected_value):
     assert results.value() == expected_value
 
 
+@pytest.mark.parametrize(
+    'count,expected',
+    [(1, [5]), (2, [0, 5]), (3, [0, 1, 5]), (4, [0, 1, 3, 5])],
+)
+def test_dice_sum_highest_tied_combat_dice(count, expected):
+    rolls = [
+        CombatDieRoll(1), CombatDieRoll(1, True), CombatDieRoll(0),
+        CombatDieRoll(1), CombatDieRoll(0), CombatDieRoll(2),
+    ]
+    results = DiceSum(rolls).highest(count)
+    assert list(results.kept_indexes()) == expected
+
+
+@pytest.mark.parametrize(
+    'count,expected',
+    [(1, [1]), (2, [1, 2]), (3, [1, 2, 4]), (4, [0, 1, 2, 4])],
+)
+def test_dice_sum_lowest_tied_combat_dice(count, expected):
+    rolls = [
+        CombatDieRoll(2), CombatDieRoll(1), CombatDieRoll(1, True),
+        CombatDieRoll(2), CombatDieRoll(1), CombatDieRoll(2),
+    ]
+    results = DiceSum(rolls).lowest(count)
+    assert list(results.kept_indexes()) == expected
+
+
 def test_dice_sum_combat_dice():
     total = DiceSum([
         CombatDieRoll(2), CombatDieRoll(1, True),
@@ -65,6 +65,52 @@ def test_tokenize(input, tokens):
     assert result == tokens
 
 
+def test_tokenize_returns_new_list():
+    tokens = tokenize('1d20 3c')
+    tokens.clear()
+    assert tokenize('1d20 3c') == [Dice(1, 20), Combat(3)]
+
+
+@pytest.mark.parametrize(
+    'token,expected',
+    [
+        ('+', Token.ADD),
+        ('(', Token.GROUP_START),
+        (')', Token.GROUP_END),
+        ('1d20', Dice(1, 20)),
+        ('2D6', Dice(2, 6)),
+        ('h', KeepHighest(1)),
+        ('kh2', KeepHighest(2)),
+        ('l', KeepLowest(1)),
+        ('kl3', KeepLowest(3)),
+        ('<10', LT(10)),
+        ('<=10', LE(10)),
+        ('>10', GT(10)),
+        ('>=10', GE(10)),
+        ('<-10', CritLE(10)),
+        ('->10', CritGE(10)),
+        ('c', Combat(1)),
+        ('3c', Combat(3)),
+        ('42', Constant(42)),
+        ('-13', Constant(-13)),
+    ],
+)
+def test_token_from_str(token, expected):
+    result = Token.from_str(token)
+    assert result == expected
+
+
+@pytest.mark.parametrize('token', ['x', '?', 'k', '1d', '1d20 + 2'])
+def test_token_from_str_unknown(token):
+    with pytest.raises(ValueError, match='Unknown token'):
+        Token.from_str(token)
+
+
+def test_tokenize_unknown_token():
+    with pytest.raises(ValueError, match='Unknown token x'):
+        tokenize('1d20 + x')
+
+
 @pytest.mark.parametrize(
     'token,dice',
     [